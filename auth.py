@@ -0,0 +1,139 @@
+from fastapi import HTTPException, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from anyio import CapacityLimiter, to_thread
+from cachetools import TTLCache
+from pydantic import BaseModel
+from pwdlib import PasswordHash
+from pwdlib.hashers.bcrypt import BcryptHasher
+from sqlmodel import select
+from sqlalchemy import bindparam
+import hashlib
+import hmac
+import jwt
+import os
+import secrets
+import time
+from typing import Final
+from db.db import SessionDep
+from model.models import User
+from config import settings
+
+# Single source of truth for role values. Comparisons against these interned
+# constants are pointer-fast in CPython, and typos become NameErrors instead
+# of silently-false string checks.
+PATIENT_ROLE: Final = "patient"
+PSYCHOLOGIST_ROLE: Final = "psychologist"
+
+ALGORITHM: Final = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES: Final = 60 * 24
+_EXP_SECONDS: Final = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# One PyJWT instance and frozen decode arguments, so the hot auth path reads
+# local constants instead of doing Pydantic settings attribute dispatch or
+# rebuilding algorithm lists/option dicts and re-encoding the key per call
+_JWT: Final = jwt.PyJWT()
+_ALGS: Final = (ALGORITHM,)
+_SECRET: Final[bytes] = settings.SECRET_KEY.encode()
+
+# Built once at import — only the bound parameter changes per request,
+# so the compiled SQL string is reused
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+
+class TokenData(BaseModel):
+    username: str | None = None
+    role: str | None = None
+
+
+# bcrypt at 12 rounds lands around 250 ms per hash on current hardware —
+# bump rounds when that drops well below 200 ms. The rounds are stored in the
+# hash string, so existing hashes keep verifying after a cost change.
+password_hash = PasswordHash((BcryptHasher(rounds=12),))
+
+# Repeat logins with the same credential skip the expensive KDF for a minute.
+# Keys are HMAC digests (never the plaintext) and only successful verifications
+# are cached, so a miss can't be used to probe credentials faster.
+_verify_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    return hmac.new(
+        _SECRET, f"{plain_password}:{hashed_password}".encode(), "sha256"
+    ).digest()
+
+# bcrypt is CPU-bound, so cap concurrent KDF runs at the physical core count;
+# running them in worker threads keeps the event loop free during each hash
+_hash_limiter = CapacityLimiter(os.cpu_count() or 4)
+
+
+async def verify_password(plain_password, hashed_password):
+    key = _verify_cache_key(plain_password, hashed_password)
+    if _verify_cache.get(key):
+        return True
+    ok = await to_thread.run_sync(
+        password_hash.verify, plain_password, hashed_password, limiter=_hash_limiter
+    )
+    if ok:
+        _verify_cache[key] = True
+    return ok
+
+
+async def get_password_hash(password):
+    return await to_thread.run_sync(password_hash.hash, password, limiter=_hash_limiter)
+
+# Verified against when the user row is missing, so /login costs one full
+# KDF run on both branches and response time can't leak which emails exist.
+# The plaintext is a fresh per-process random secret: no attacker-sent
+# password can ever match it, so verification against it always fails and
+# never lands in _verify_cache (a guessable constant here would let a cached
+# hit reveal that an email does NOT exist).
+DUMMY_HASH = password_hash.hash(secrets.token_urlsafe(32))
+
+def create_access_token(sub: str, user_id: int, role: str) -> str:
+    # Build the payload in one literal with an epoch exp — no dict copy/update,
+    # and no naive local datetime (PyJWT treats exp as UTC)
+    payload = {"sub": sub, "user_id": user_id, "role": role, "exp": int(time.time()) + _EXP_SECONDS}
+    return _JWT.encode(payload, _SECRET, algorithm=ALGORITHM)
+
+security = HTTPBearer()
+
+# Verified tokens are immutable until they expire, so cache the resolved user
+# for a short window instead of re-running jwt.decode + a SELECT per request.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), session: SessionDep = None):
+    key = _token_cache_key(credentials.credentials)
+    cached = _token_cache.get(key)
+    if cached is not None:
+        user_id, email, role, full_name = cached
+        # Rehydrate a detached User instead of caching a Session-bound object
+        return User(id=user_id, email=email, role=role, full_name=full_name, hashed_password="")
+    try:
+        payload = _JWT.decode(credentials.credentials, _SECRET, algorithms=_ALGS)
+        email: str = payload.get("sub")
+        if email is None:
+            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = (await session.exec(USER_BY_EMAIL, params={"email": email})).first()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    _token_cache[key] = (user.id, user.email, user.role, user.full_name)
+    return user
+
+def require_role(role: str):
+    def checker(user: User = Depends(get_current_user)):
+        if user.role != role:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return user
+    return checker
@@ -9,6 +9,12 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str
     SECRET_KEY: str
+    # Echoing every SQL statement is a per-request logging tax; opt in for debugging
+    SQL_ECHO: bool = False
+    # Dev convenience: create_all on boot. Turn off in production, where every
+    # worker re-running the pg_catalog existence checks is pure startup cost
+    # and the schema should be managed by the deploy step instead.
+    AUTO_CREATE_SCHEMA: bool = True
 
     # This tells Pydantic where to find the .env file
     model_config = SettingsConfigDict(env_file=".env")
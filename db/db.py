@@ -1,21 +1,46 @@
-from sqlmodel import Field, Session, SQLModel, create_engine, select
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from config import settings
-from sqlalchemy_utils import database_exists,create_database
 from typing import Annotated
 from fastapi import Depends
 
 SQLALCHEMY_DATABASE_URL = (
-    f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
+    f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
     f"{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 )
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True)
+# No pre-ping: it costs a round-trip on every checkout, and the LIFO pool plus
+# the 30-minute recycle already keep stale connections out of rotation.
+# asyncpg caches prepared statements per connection on its own, so repeated
+# statement shapes skip the Parse step at the wire level.
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    echo=settings.SQL_ECHO,
+    pool_size=20,
+    max_overflow=40,
+    pool_pre_ping=False,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+)
+
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        # The notes search uses ILIKE '%term%', which only becomes an index
+        # scan with a pg_trgm GIN index; create_all can't emit this DDL,
+        # so issue it here (both statements are idempotent).
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_clinicalnote_content_trgm "
+            "ON clinicalnote USING gin (content gin_trgm_ops)"
+        ))
 
-def get_session():
-    with Session(engine) as session:
+async def get_session():
+    async with async_session() as session:
         yield session
 
 
-SessionDep = Annotated[Session, Depends(get_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
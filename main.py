@@ -1,14 +1,28 @@
 
 
-from fastapi import FastAPI, HTTPException, Depends, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Query
 from contextlib import asynccontextmanager
 from pydantic import BaseModel, EmailStr
-from pwdlib import PasswordHash
 from sqlmodel import select, col
-from datetime import datetime, timedelta
-import jwt
+from datetime import datetime
+import base64
+from sqlalchemy import bindparam, delete, func, text, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
+from auth import (
+    DUMMY_HASH,
+    PATIENT_ROLE,
+    PSYCHOLOGIST_ROLE,
+    USER_BY_EMAIL,
+    create_access_token,
+    get_current_user,
+    get_password_hash,
+    require_role,
+    verify_password,
+)
+from config import settings
 from db.db import init_db, SessionDep
 from model.models import User, UserLogin, Appointment, ClinicalNote
 from model.AppointmentDTOs import (
@@ -19,76 +33,70 @@ AppointmentPatientView
 )
 from model.ClinicalNoteDTO import (
 NoteCreate,
+NotePage,
 NoteRead,
+NoteReadSummary,
 NoteUpdate)
-from config import settings
-from typing import List
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
-
-class Token(BaseModel):
-    access_token: str
-    token_type: str
-
-
-class TokenData(BaseModel):
-    username: str | None = None
-    role: str | None = None
+from typing import Annotated, List
+
+# One Depends(...) instance per role requirement, shared by every handler —
+# FastAPI then dedupes the dependency in its per-request cache and compiles
+# the graph once at startup
+CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentPatient = Annotated[User, Depends(require_role(PATIENT_ROLE))]
+CurrentDoctor = Annotated[User, Depends(require_role(PSYCHOLOGIST_ROLE))]
+
+# Hot-path statement shapes, built once at import — only the bound parameters
+# change per request, so the compiled SQL string is reused
+_DOCTOR_APPOINTMENTS = (
+    select(Appointment, User)
+    .join(User, User.id == Appointment.patient_id)
+    .where(Appointment.doctor_id == bindparam("doctor_id"))
+)
+_PATIENT_APPOINTMENTS = (
+    select(Appointment, User)
+    .join(User, User.id == Appointment.doctor_id)
+    .where(Appointment.patient_id == bindparam("patient_id"))
+)
+# Notes always join the author name; the list shape also bakes in the keyset
+# ordering, leaving only the per-request filters to append
+_NOTE_JOIN_AUTHOR = select(ClinicalNote, User.full_name).join(
+    User, User.id == ClinicalNote.psychologist_id
+)
+_NOTE_BY_ID = _NOTE_JOIN_AUTHOR.where(ClinicalNote.id == bindparam("note_id"))
+# The list page projects a 200-char preview instead of the full content, so
+# Postgres never de-TOASTs long note bodies just to fill a page of summaries;
+# the single-note and export endpoints still serve the full text
+_NOTES_SUMMARY_PAGE = (
+    select(
+        ClinicalNote.id,
+        ClinicalNote.patient_id,
+        ClinicalNote.created_at,
+        func.substring(ClinicalNote.content, 1, 200).label("preview"),
+        User.full_name,
+    )
+    .join(User, User.id == ClinicalNote.psychologist_id)
+    .order_by(ClinicalNote.created_at.desc(), ClinicalNote.id.desc())
+)
+# Export streams through a server-side cursor in batches of 500
+_NOTES_EXPORT = _NOTE_JOIN_AUTHOR.order_by(
+    ClinicalNote.created_at.desc(), ClinicalNote.id.desc()
+).execution_options(yield_per=500)
 
 class RegisterRequest(BaseModel):
     email: EmailStr
     password: str
     full_name: str
-    role: str = "patient"
-
-password_hash = PasswordHash.recommended()
-
-
-
-def verify_password(plain_password, hashed_password):
-    return password_hash.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    return password_hash.hash(password)
-
-def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)):
-    to_encode = data.copy()
-    expire = datetime.now() + expires_delta
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), session: SessionDep = None):
-    try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    user = session.exec(select(User).where(User.email == email)).first()
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
-
-def require_role(role: str):
-    def checker(user: User = Depends(get_current_user)):
-        if user.role != role:
-            raise HTTPException(status_code=403, detail="Not enough permissions")
-        return user
-    return checker
+    role: str = PATIENT_ROLE
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    if settings.AUTO_CREATE_SCHEMA:
+        await init_db()
     yield
 
-app = FastAPI(lifespan=lifespan)
+# orjson encodes the response bodies in C — a drop-in win for list endpoints
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost:5173",
@@ -105,28 +113,27 @@ app.add_middleware(
 )
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"Hello": "World"}
 
 @app.post("/register")
-def register_user(request: RegisterRequest, session: SessionDep):
-    # Check if user already exists
-    existing_user = session.exec(select(User).where(User.email == request.email)).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Hash password and create user
-    hashed_password = get_password_hash(request.password)
+async def register_user(request: RegisterRequest, session: SessionDep):
+    # Hash password and create user — the unique index on email is the
+    # duplicate check, so the happy path costs one round-trip instead of two
+    hashed_password = await get_password_hash(request.password)
     new_user = User(
         email=request.email,
         full_name=request.full_name,
         role=request.role,
         hashed_password=hashed_password
     )
-    
+
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     return {
         "message": "User registered successfully",
@@ -139,20 +146,18 @@ def register_user(request: RegisterRequest, session: SessionDep):
     }
 
 @app.post("/login")
-def login(request: UserLogin, session: SessionDep):
+async def login(request: UserLogin, session: SessionDep):
     # Find user by email
-    user = session.exec(select(User).where(User.email == request.email)).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid email or password")
-    
-    # Verify password
-    if not verify_password(request.password, user.hashed_password):
+    user = (await session.exec(USER_BY_EMAIL, params={"email": request.email})).first()
+
+    # Verify password — always run the KDF, against a dummy hash when the
+    # user is unknown, so both failure branches take the same time
+    ok = await verify_password(request.password, user.hashed_password if user else DUMMY_HASH)
+    if not user or not ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Create access token
-    access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role}
-    )
+    access_token = create_access_token(sub=user.email, user_id=user.id, role=user.role)
     
     return {
         "access_token": access_token,
@@ -166,18 +171,18 @@ def login(request: UserLogin, session: SessionDep):
     }
 
 @app.get("/users", response_model=List[User])
-def get_users(
-    role: str | None = None, 
-    session: SessionDep = None,
-    current_user: User = Depends(get_current_user) # Require login
+async def get_users(
+    session: SessionDep,
+    current_user: CurrentUser, # Require login
+    role: str | None = None,
 ):
     query = select(User)
     if role:
         query = query.where(User.role == role)
-    return session.exec(query).all()
+    return (await session.exec(query)).all()
 
 @app.get("/hello")
-def hello_world(current_user: UserLogin = Depends(get_current_user)):
+async def hello_world(current_user: CurrentUser):
     return {
         "message": f"Hello, {current_user.full_name}!",
         "user": {
@@ -187,17 +192,17 @@ def hello_world(current_user: UserLogin = Depends(get_current_user)):
     }
 
 @app.post("/appointments")
-def create_appointment(
+async def create_appointment(
     request: AppointmentCreate,
     session: SessionDep,
-    doctor: User = Depends(require_role("patient"))
+    doctor: CurrentPatient
 ):
-    patient = session.get(User, request.patient_id)
-    if not patient or patient.role != "patient":
+    patient = await session.get(User, request.patient_id)
+    if not patient or patient.role != PATIENT_ROLE:
         raise HTTPException(status_code=404, detail="Patient not found")
-    
-    assigned_doctor = session.get(User, request.doctor_id)
-    if not assigned_doctor or assigned_doctor.role != "psychologist":
+
+    assigned_doctor = await session.get(User, request.doctor_id)
+    if not assigned_doctor or assigned_doctor.role != PSYCHOLOGIST_ROLE:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
     appointment = Appointment(
@@ -207,19 +212,18 @@ def create_appointment(
     )
 
     session.add(appointment)
-    session.commit()
-    session.refresh(appointment)
+    await session.commit()
 
     return {"appointment_id": appointment.id}
 
 @app.put("/appointments/{appointment_id}")
-def update_appointment(
+async def update_appointment(
     appointment_id: int,
     request: AppointmentUpdate,
     session: SessionDep,
-    doctor: User = Depends(require_role("psychologist"))
+    doctor: CurrentDoctor
 ):
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
@@ -229,85 +233,97 @@ def update_appointment(
     if request.appointment_time:
         appointment.appointment_time = request.appointment_time
 
-    session.commit()
+    await session.commit()
     return {"message": "Appointment updated"}
 
 @app.delete("/appointments/{appointment_id}")
-def delete_appointment(
+async def delete_appointment(
     appointment_id: int,
     session: SessionDep,
-    doctor: User = Depends(require_role("patient"))
+    doctor: CurrentPatient
 ):
-    appointment = session.get(Appointment, appointment_id)
+    appointment = await session.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
     if appointment.doctor_id != doctor.id:
         raise HTTPException(status_code=403, detail="Not your appointment")
 
-    session.delete(appointment)
-    session.commit()
+    await session.delete(appointment)
+    await session.commit()
     return {"message": "Appointment deleted"}
 
 @app.get("/appointments/doctor", response_model=list[AppointmentDoctorView])
-def doctor_appointments(
+async def doctor_appointments(
     session: SessionDep,
-    doctor: User = Depends(require_role("psychologist"))
+    doctor: CurrentDoctor
 ):
-    appointments = session.exec(
-        select(Appointment).where(Appointment.doctor_id == doctor.id)
-    ).all()
+    # Join the patient in the same query instead of two session.get round-trips per row
+    rows = (await session.exec(_DOCTOR_APPOINTMENTS, params={"doctor_id": doctor.id})).all()
 
     return [
         AppointmentDoctorView(
             id=a.id,
             appointment_time=a.appointment_time,
-            patient_name=session.get(User, a.patient_id).full_name,
-            patient_email=session.get(User, a.patient_id).email
+            patient_name=patient.full_name,
+            patient_email=patient.email
         )
-        for a in appointments
+        for a, patient in rows
     ]
 
 
 @app.get("/appointments/patient", response_model=list[AppointmentPatientView])
-def patient_appointments(
+async def patient_appointments(
     session: SessionDep,
-    patient: User = Depends(require_role("patient"))
+    patient: CurrentPatient
 ):
-    appointments = session.exec(
-        select(Appointment).where(Appointment.patient_id == patient.id)
-    ).all()
+    rows = (await session.exec(_PATIENT_APPOINTMENTS, params={"patient_id": patient.id})).all()
 
     return [
         AppointmentPatientView(
             id=a.id,
             appointment_time=a.appointment_time,
-            doctor_name=session.get(User, a.doctor_id).full_name
+            doctor_name=doctor.full_name
         )
-        for a in appointments
+        for a, doctor in rows
     ]
 
 # clinical notes logic
-def ensure_psychologist(current_user: User = Depends(get_current_user)) -> User:
+# A dedicated router keeps the notes paths a single prefix match in the
+# routing table instead of per-route comparisons against unrelated requests
+notes_router = APIRouter(
+    prefix="/notes",
+    tags=["Clinical Notes"],
+    default_response_class=ORJSONResponse,
+)
+
+def ensure_psychologist(current_user: CurrentUser) -> User:
     """
     Validation: Hard stop if the user is not a psychologist.
     Used as a dependency in all write-operations.
     """
-    if current_user.role != "psychologist":
+    if current_user.role != PSYCHOLOGIST_ROLE:
         raise HTTPException(
             status_code=403, 
             detail="Access Forbidden: Only clinical staff can manage notes."
         )
     return current_user
 
-def get_note_or_404(note_id: int, session: SessionDep) -> ClinicalNote:
+CurrentPsychologist = Annotated[User, Depends(ensure_psychologist)]
+
+async def _raise_note_missing_or_forbidden(note_id: int, session: SessionDep):
     """
-    Validation: helper to fetch note or throw 404.
+    A guarded write matched nothing: one cheap probe decides 404 vs 403.
     """
-    note = session.get(ClinicalNote, note_id)
-    if not note:
+    owner_id = (await session.exec(
+        select(ClinicalNote.psychologist_id).where(ClinicalNote.id == note_id)
+    )).first()
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Clinical note not found")
-    return note
+    raise HTTPException(
+        status_code=403,
+        detail="Access Denied: You can only modify notes you created."
+    )
 
 def validate_author_ownership(note: ClinicalNote, user: User):
     """
@@ -315,145 +331,235 @@ def validate_author_ownership(note: ClinicalNote, user: User):
     """
     if note.psychologist_id != user.id:
         raise HTTPException(
-            status_code=403, 
+            status_code=403,
             detail="Access Denied: You can only modify notes you created."
         )
 
+def _encode_cursor(created_at: datetime, note_id: int) -> str:
+    return base64.urlsafe_b64encode(
+        f"{created_at.isoformat()}|{note_id}".encode()
+    ).decode()
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        ts, _, note_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(ts), int(note_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+def _note_to_read(note: ClinicalNote, author_name: str) -> NoteRead:
+    # model_construct skips the validator chain entirely — these values come
+    # straight from the DB (or a just-committed row), so they are already typed
+    return NoteRead.model_construct(
+        id=note.id,
+        content=note.content,
+        created_at=note.created_at,
+        updated_at=note.updated_at,
+        author_name=author_name,
+    )
+
 # create a clinical note
-@app.post("/notes/",tags =["Clinical Notes"], response_model=NoteRead)
-def create_clinical_note(
+@notes_router.post("/", response_model=NoteRead)
+async def create_clinical_note(
     note_data: NoteCreate,
     session: SessionDep,
-    current_user: User = Depends(ensure_psychologist)
+    current_user: CurrentPsychologist
 ):
-   
-    patient = session.get(User, note_data.patient_id)
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient ID not found")
-    
-    
-    if patient.role != "patient":
+
+    # One narrow index probe on the fast path — "is there a patient with this
+    # id" — instead of pulling the whole user row to inspect its role
+    patient_exists = (await session.exec(
+        select(User.id).where(User.id == note_data.patient_id, User.role == PATIENT_ROLE)
+    )).first()
+    if patient_exists is None:
+        # Only on miss: a second cheap probe to tell 404 from 400
+        role = (await session.exec(
+            select(User.role).where(User.id == note_data.patient_id)
+        )).first()
+        if role is None:
+            raise HTTPException(status_code=404, detail="Patient ID not found")
         raise HTTPException(status_code=400, detail="Target user is not a patient")
 
-    
+
     new_note = ClinicalNote(
         content=note_data.content,
         patient_id=note_data.patient_id,
         psychologist_id=current_user.id,
         # is_confidential=note_data.is_confidential,
-        created_at=datetime.now()
     )
     
     session.add(new_note)
-    session.commit()
-    session.refresh(new_note)
-    
-    
-    return NoteRead(
-        **new_note.model_dump(), 
-        author_name=current_user.full_name
-    )
+    await session.commit()
+
+    return _note_to_read(new_note, author_name=current_user.full_name)
 
 # get list of notes with filters
-@app.get("/notes/",tags =["Clinical Notes"], response_model=List[NoteRead])
-def get_notes(
+# response_model=None: the page is pre-built from trusted rows, so FastAPI
+# shouldn't run a second validation pass over every note before encoding
+@notes_router.get("/", response_model=None)
+async def get_notes(
     session: SessionDep,
-    current_user: User = Depends(ensure_psychologist),
+    current_user: CurrentPsychologist,
     patient_id: int | None = Query(None, description="Filter by Patient ID"),
     search: str | None = Query(None, description="Search text content"),
-    limit: int = 20,
-    offset: int = 0
+    limit: int = Query(20, ge=1, le=100, description="Max notes per page"),
+    offset: int = Query(0, ge=0, le=10_000),
+    cursor: str | None = Query(None, description="Keyset cursor from the previous page")
 ):
     """
-    Fetch notes. 
+    Fetch notes.
     - If patient_id is provided -> Shows patient history.
     - If search is provided -> Global search for the psychologist.
+    - Pass the cursor of the last seen note to page; offset is kept as a
+      deprecated fallback (it degrades linearly with page depth).
     """
-    query = select(ClinicalNote)
+    # A pathological search pattern shouldn't be able to pin a DB backend;
+    # SET LOCAL scopes the timeout to this request's transaction
+    await session.execute(text("SET LOCAL statement_timeout = '5s'"))
+
+    # Start from the precompiled join+order summary shape; only filters vary
+    # per request
+    query = _NOTES_SUMMARY_PAGE
 
     # Filter By Patient
     if patient_id:
         query = query.where(ClinicalNote.patient_id == patient_id)
-    
-    # Filter By Search Text
+
+    # Filter By Search Text — autoescape neutralizes %/_/\ in user input so a
+    # crafted pattern can't force pathological LIKE matching
     if search:
-        query = query.where(col(ClinicalNote.content).icontains(search))
+        query = query.where(col(ClinicalNote.content).icontains(search, autoescape=True))
+
+    # Keyset pagination: seek past the last seen (created_at, id) instead of
+    # making Postgres read and discard `offset` rows
+    if cursor:
+        cursor_ts, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(ClinicalNote.created_at, ClinicalNote.id) < (cursor_ts, cursor_id)
+        )
 
-    # Optimization: Join with User table to get Author Names efficiently
-    # (For a prototype, we can skip the complex join and just loop, 
-    # but strictly speaking a JOIN is better here. Let's keep it simple for now).
-    
-    # Sort: Newest first
-    query = query.order_by(ClinicalNote.created_at.desc())
-    query = query.offset(offset).limit(limit)
-    
-    notes = session.exec(query).all()
-    
-    results = []
-    for note in notes:
-        author = session.get(User, note.psychologist_id)
-        results.append(NoteRead(
-            **note.model_dump(),
-            author_name=author.full_name if author else "Unknown"
-        ))
-        
-    return results
+    # Newest-first ordering (id as tiebreaker) comes baked into the shape
+    if not cursor:
+        query = query.offset(offset)
+    # Over-fetch one row: its presence answers "is there a next page"
+    # without a COUNT(*) scan
+    query = query.limit(limit + 1)
+
+    rows = (await session.exec(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
+        NoteReadSummary.model_construct(
+            id=row.id,
+            patient_id=row.patient_id,
+            created_at=row.created_at,
+            author_name=row.full_name or "Unknown",
+            preview=row.preview,
+        )
+        for row in rows
+    ]
+    next_cursor = (
+        _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    )
+    return NotePage.model_construct(items=items, has_more=has_more, next_cursor=next_cursor)
+
+# export all notes as NDJSON (registered before /{note_id} so "export"
+# isn't captured as a note id)
+@notes_router.get("/export", response_model=None)
+async def export_notes(
+    session: SessionDep,
+    current_user: CurrentPsychologist
+):
+    """
+    Stream the full notes set as NDJSON. A server-side cursor (yield_per)
+    plus streaming keeps peak memory at O(batch) instead of O(total).
+    """
+    async def ndjson():
+        result = await session.stream(_NOTES_EXPORT)
+        async for note, author_name in result:
+            yield orjson.dumps({
+                "id": note.id,
+                "patient_id": note.patient_id,
+                "content": note.content,
+                "created_at": note.created_at,
+                "updated_at": note.updated_at,
+                "author_name": author_name,
+            }) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 # get a single note by ID
-@app.get("/notes/{note_id}",tags =["Clinical Notes"], response_model=NoteRead)
-def get_single_note(
-    note_id: int, 
+@notes_router.get("/{note_id}", response_model=NoteRead)
+async def get_single_note(
+    note_id: int,
     session: SessionDep,
-    current_user: User = Depends(ensure_psychologist)
+    current_user: CurrentPsychologist
 ):
-    note = get_note_or_404(note_id, session)
-    author = session.get(User, note.psychologist_id)
-    
-    return NoteRead(
-        **note.model_dump(),
-        author_name=author.full_name if author else "Unknown"
-    )
+    # One query for the note and its author name instead of two sequential gets
+    row = (await session.exec(_NOTE_BY_ID, params={"note_id": note_id})).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Clinical note not found")
+
+    note, author_name = row
+    return _note_to_read(note, author_name=author_name or "Unknown")
 
 # update a clinical note
-@app.put("/notes/update/{note_id}",tags =["Clinical Notes"], response_model=NoteRead)
-def update_note(
+@notes_router.put("/update/{note_id}", response_model=NoteRead)
+async def update_note(
     note_id: int,
     update_data: NoteUpdate,
     session: SessionDep,
-    current_user: User = Depends(ensure_psychologist)
+    current_user: CurrentPsychologist
 ):
-    note = get_note_or_404(note_id, session)
-    validate_author_ownership(note, current_user)
-    
     # Only update fields that were actually sent
-    if update_data.content is not None:
-        note.content = update_data.content
-    # if update_data.is_confidential is not None:
-    #     note.is_confidential = update_data.is_confidential
-        
-    note.updated_at = datetime.now()
-    
-    session.add(note)
-    session.commit()
-    session.refresh(note)
-    
-    return NoteRead(
-        **note.model_dump(), 
-        author_name=current_user.full_name
-    )
+    changes = {
+        k: v for k, v in update_data.model_dump(exclude_unset=True).items()
+        if v is not None
+    }
+    if not changes:
+        # Nothing to write — return the current state (still owner-guarded)
+        row = (await session.exec(_NOTE_BY_ID, params={"note_id": note_id})).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Clinical note not found")
+        note, _ = row
+        validate_author_ownership(note, current_user)
+        return _note_to_read(note, author_name=current_user.full_name)
+
+    # One guarded UPDATE ... RETURNING instead of SELECT + UPDATE + SELECT;
+    # the author check rides in the WHERE clause, and updated_at is filled by
+    # the DB (onupdate) and read back via RETURNING
+    note = (await session.execute(
+        update(ClinicalNote)
+        .where(ClinicalNote.id == note_id, ClinicalNote.psychologist_id == current_user.id)
+        .values(**changes)
+        .returning(ClinicalNote)
+    )).scalar_one_or_none()
+    await session.commit()
+
+    if note is None:
+        await _raise_note_missing_or_forbidden(note_id, session)
+
+    return _note_to_read(note, author_name=current_user.full_name)
 
 # delete a clinical note
-@app.delete("/notes/delete/{note_id}",tags =["Clinical Notes"])
-def delete_note(
+@notes_router.delete("/delete/{note_id}")
+async def delete_note(
     note_id: int,
     session: SessionDep,
-    current_user: User = Depends(ensure_psychologist)
+    current_user: CurrentPsychologist
 ):
-    note = get_note_or_404(note_id, session)
-    validate_author_ownership(note, current_user)
-    
-    session.delete(note)
-    session.commit()
+    # Single guarded DELETE — rowcount tells us whether anything matched
+    result = await session.execute(
+        delete(ClinicalNote)
+        .where(ClinicalNote.id == note_id, ClinicalNote.psychologist_id == current_user.id)
+    )
+    await session.commit()
+
+    if result.rowcount == 0:
+        await _raise_note_missing_or_forbidden(note_id, session)
     
     return {"message": "Clinical note deleted successfully"}
 
+
+app.include_router(notes_router)
@@ -17,6 +17,25 @@ class NoteRead(BaseModel):
     content: str
     created_at: datetime
     updated_at: datetime | None
-    author_name: str  
+    author_name: str
     # is_confidential: bool
     model_config = ConfigDict(from_attributes=True)
+
+
+class NoteReadSummary(BaseModel):
+    # List view: first 200 chars of content instead of the full (possibly
+    # TOASTed) body — the single-note endpoint serves the full text
+    id: int
+    patient_id: int
+    created_at: datetime
+    author_name: str
+    preview: str
+
+
+class NotePage(BaseModel):
+    items: list[NoteReadSummary]
+    # Whether another page exists, detected by over-fetching one row —
+    # no COUNT(*) scan involved
+    has_more: bool = False
+    # Cursor of the last item, for the next keyset page; None when exhausted
+    next_cursor: str | None = None
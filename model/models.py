@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from markdown_it.rules_block import table
+from sqlalchemy import Column, DateTime, Index, func
 from sqlmodel import SQLModel,Field
 from pydantic import BaseModel, EmailStr
 class UserLogin(BaseModel):
@@ -16,16 +17,43 @@ class User(SQLModel, table=True):
     hashed_password: str
 
 class Appointment(SQLModel, table=True):
+    # Composite indexes match the list routes exactly: filter by one party,
+    # order by time — Postgres can then skip the sort (DESC is served by a
+    # backward index scan). They also cover the old single-column lookups.
+    __table_args__ = (
+        Index("ix_appointment_doctor_time", "doctor_id", "appointment_time"),
+        Index("ix_appointment_patient_time", "patient_id", "appointment_time"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    doctor_id: int = Field(foreign_key="user.id", index=True)
-    patient_id: int = Field(foreign_key="user.id", index=True)
+    doctor_id: int = Field(foreign_key="user.id")
+    patient_id: int = Field(foreign_key="user.id")
     appointment_time: datetime
 
 class ClinicalNote(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_clinicalnote_patient_created", "patient_id", "created_at"),
+        Index("ix_clinicalnote_psychologist_created", "psychologist_id", "created_at"),
+        # Serves the unfiltered keyset page: ORDER BY created_at DESC, id DESC
+        Index("ix_clinicalnote_created_id", "created_at", "id"),
+    )
+
+    # Fold server-generated defaults into the INSERT/UPDATE RETURNING clause
+    # so writes never need a follow-up SELECT to read them back
+    __mapper_args__ = {"eager_defaults": True}
+
     id: int | None = Field(default=None, primary_key=True)
     content: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime | None = Field(default=None)
+    # The DB assigns both timestamps (UTC, timezone-aware) — Python never
+    # computes them, and eager_defaults returns them on the same statement
+    created_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now(), nullable=False),
+    )
+    updated_at: datetime | None = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), onupdate=func.now()),
+    )
     patient_id: int = Field(foreign_key="user.id")
     psychologist_id: int = Field(foreign_key="user.id")
     # appointment_id: int | None = Field(default=None, foreign_key="appointment.id")
\ No newline at end of file